@@ -4,15 +4,37 @@
 from __future__ import annotations
 
 import argparse
+import hashlib
+import json
+import os
 import sys
+import time
+from collections.abc import Iterable, Iterator, Sequence
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from datetime import datetime
+from datetime import datetime, timedelta, timezone, tzinfo
+from functools import lru_cache
 from pathlib import Path
 from zoneinfo import ZoneInfo
 
 
 READONLY_SCOPE = "https://www.googleapis.com/auth/calendar.readonly"
 DEFAULT_TIMEZONE = "Asia/Tokyo"
+DEFAULT_CALENDAR_ID = "primary"
+# Partial responses: only the event fields aggregate_event_seconds reads.
+EVENT_LIST_FIELDS = (
+    "etag,nextPageToken,items(status,summary,start(dateTime,date),end(dateTime,date))"
+)
+SYNC_EVENT_LIST_FIELDS = (
+    "nextPageToken,nextSyncToken,items(id,status,summary,start(dateTime,date),end(dateTime,date))"
+)
+# Calendar API accepts at most 50 calls per batch request.
+CALENDAR_BATCH_LIMIT = 50
+# Cached response pages untouched for this long are deleted.
+RESPONSE_CACHE_MAX_AGE = 30 * 24 * 60 * 60
+
+_cached_service = None
+_cached_token_credentials: tuple[tuple[str, int], object] | None = None
 
 
 class WorklogError(Exception):
@@ -33,6 +55,11 @@ class MatchedEventDetail:
     counted_seconds: float
 
 
+@lru_cache(maxsize=32)
+def get_zone(timezone_name: str) -> ZoneInfo:
+    return ZoneInfo(timezone_name)
+
+
 def parse_month_window(month: str, timezone_name: str) -> MonthWindow:
     parts = month.split("-")
     if len(parts) != 2:
@@ -46,7 +73,7 @@ def parse_month_window(month: str, timezone_name: str) -> MonthWindow:
         raise WorklogError("--month must be in YYYY-MM format.")
 
     try:
-        tz = ZoneInfo(timezone_name)
+        tz = get_zone(timezone_name)
     except Exception as exc:  # pragma: no cover - platform tz db issue
         raise WorklogError(f"Invalid timezone: {timezone_name}") from exc
 
@@ -58,41 +85,77 @@ def parse_month_window(month: str, timezone_name: str) -> MonthWindow:
     return MonthWindow(start=start, end=end)
 
 
-def is_all_day_event(event: dict) -> bool:
-    return "date" in event.get("start", {}) or "date" in event.get("end", {})
-
-
-def parse_event_datetime(value: str) -> datetime:
-    # Google may return a trailing "Z", which datetime.fromisoformat does not parse directly.
-    normalized = value.replace("Z", "+00:00")
-    return datetime.fromisoformat(normalized)
+_OFFSET_TIMEZONES: dict[str, tzinfo] = {"Z": timezone.utc, "+00:00": timezone.utc}
+
+
+def _offset_timezone(suffix: str) -> tzinfo:
+    tz = _OFFSET_TIMEZONES.get(suffix)
+    if tz is None:
+        offset = timedelta(hours=int(suffix[1:3]), minutes=int(suffix[4:6]))
+        tz = timezone(-offset if suffix[0] == "-" else offset)
+        _OFFSET_TIMEZONES[suffix] = tz
+    return tz
+
+
+def parse_fixed_layout_datetime(value: str) -> datetime:
+    # Google returns "YYYY-MM-DDTHH:MM:SS" followed by "Z" or "+HH:MM"; slice that layout
+    # directly and defer anything else to datetime.fromisoformat.
+    length = len(value)
+    if value[10:11] == "T" and (
+        (length == 20 and value[19] == "Z")
+        or (length == 25 and value[19] in "+-" and value[22] == ":")
+    ):
+        return datetime(
+            int(value[0:4]),
+            int(value[5:7]),
+            int(value[8:10]),
+            int(value[11:13]),
+            int(value[14:16]),
+            int(value[17:19]),
+            tzinfo=_offset_timezone(value[19:]),
+        )
+    # Google may return a trailing "Z", which datetime.fromisoformat before 3.11 does not parse.
+    if value.endswith("Z"):
+        return datetime.fromisoformat(value[:-1] + "+00:00")
+    return datetime.fromisoformat(value)
 
 
-def overlap_seconds(event_start: datetime, event_end: datetime, window: MonthWindow) -> float:
-    effective_start = max(event_start, window.start)
-    effective_end = min(event_end, window.end)
-    if effective_end <= effective_start:
-        return 0.0
-    return (effective_end - effective_start).total_seconds()
+if sys.version_info >= (3, 11):
+    # The C fromisoformat accepts a trailing "Z" since 3.11 and beats slicing in Python.
+    parse_event_datetime = datetime.fromisoformat
+else:
+    parse_event_datetime = parse_fixed_layout_datetime
 
 
 def aggregate_event_seconds(
-    events: list[dict], target_title: str, window: MonthWindow
+    events: Iterable[dict],
+    target_title: str,
+    window: MonthWindow,
+    collect_details: bool = False,
 ) -> tuple[float, int, list[MatchedEventDetail]]:
     total_seconds = 0.0
     matched_count = 0
-    details: list[MatchedEventDetail] = []
+    matches: list[tuple[datetime, datetime, float]] = []
+    window_start_ts = window.start.timestamp()
+    window_end_ts = window.end.timestamp()
 
     for event in events:
-        if event.get("status") == "cancelled":
+        # The title check rejects most events, so it runs first. CPython's str equality
+        # already rejects on length and kind before comparing characters, so a
+        # hand-written length/first-character prefilter would only add bytecode.
+        if event.get("summary") != target_title or event.get("status") == "cancelled":
             continue
-        if event.get("summary") != target_title:
+
+        start = event.get("start")
+        end = event.get("end")
+        if not start or not end:
             continue
-        if is_all_day_event(event):
+        # All-day events carry "date" instead of "dateTime" and are not counted.
+        if "date" in start or "date" in end:
             continue
 
-        start_raw = event.get("start", {}).get("dateTime")
-        end_raw = event.get("end", {}).get("dateTime")
+        start_raw = start.get("dateTime")
+        end_raw = end.get("dateTime")
         if not start_raw or not end_raw:
             continue
 
@@ -102,20 +165,24 @@ def aggregate_event_seconds(
         except ValueError:
             continue
 
-        seconds = overlap_seconds(event_start, event_end, window)
+        # Epoch floats avoid tz-aware datetime comparisons and timedelta allocations.
+        seconds = min(event_end.timestamp(), window_end_ts) - max(
+            event_start.timestamp(), window_start_ts
+        )
         if seconds > 0:
             matched_count += 1
             total_seconds += seconds
-            details.append(
-                MatchedEventDetail(
-                    title=target_title,
-                    start=event_start,
-                    end=event_end,
-                    counted_seconds=seconds,
-                )
-            )
-
-    details.sort(key=lambda detail: (detail.start, detail.end))
+            if collect_details:
+                matches.append((event_start, event_end, seconds))
+
+    # Sort plain tuples with the C comparator, then build the frozen dataclasses once.
+    matches.sort()
+    details = [
+        MatchedEventDetail(
+            title=target_title, start=event_start, end=event_end, counted_seconds=seconds
+        )
+        for event_start, event_end, seconds in matches
+    ]
     return total_seconds, matched_count, details
 
 
@@ -152,7 +219,54 @@ def resolve_aggregation_window(
     return MonthWindow(start=month_window.start, end=capped_end)
 
 
-def build_calendar_service():
+def load_token_credentials(credentials_cls, token_path: Path):
+    """Load credentials from token.json, reusing the parsed object while path and mtime match."""
+    global _cached_token_credentials
+
+    try:
+        cache_key = (str(token_path), token_path.stat().st_mtime_ns)
+    except FileNotFoundError:
+        return None
+    if _cached_token_credentials and _cached_token_credentials[0] == cache_key:
+        return _cached_token_credentials[1]
+
+    try:
+        creds = credentials_cls.from_authorized_user_file(str(token_path), [READONLY_SCOPE])
+    except FileNotFoundError:
+        return None
+    except ValueError:
+        return None
+    _cached_token_credentials = (cache_key, creds)
+    return creds
+
+
+def build_response_model(data_wrapper: bool = False):
+    """Return a JsonModel decoding with orjson when installed, or None for the default model."""
+    try:
+        import orjson
+        from googleapiclient.model import JsonModel
+    except ImportError:
+        return None
+
+    class OrjsonModel(JsonModel):
+        def deserialize(self, content):
+            try:
+                body = orjson.loads(content)
+            except orjson.JSONDecodeError:
+                return super().deserialize(content)
+            if self._data_wrapper and isinstance(body, dict) and "data" in body:
+                body = body["data"]
+            return body
+
+    return OrjsonModel(data_wrapper=data_wrapper)
+
+
+def build_calendar_service(cache: bool = True):
+    global _cached_service
+
+    if cache and _cached_service is not None:
+        return _cached_service
+
     try:
         from google.auth.transport.requests import Request
         from google.oauth2.credentials import Credentials
@@ -163,18 +277,11 @@ def build_calendar_service():
             "Missing dependencies. Run: pip install -r requirements.txt"
         ) from exc
 
-    creds = None
     base_dir = Path(__file__).resolve().parent
     token_path = base_dir / "token.json"
     credentials_path = base_dir / "credentials.json"
 
-    if Credentials and token_path:
-        try:
-            creds = Credentials.from_authorized_user_file(str(token_path), [READONLY_SCOPE])
-        except FileNotFoundError:
-            creds = None
-        except ValueError:
-            creds = None
+    creds = load_token_credentials(Credentials, token_path)
 
     if not creds or not creds.valid:
         if creds and creds.expired and creds.refresh_token:
@@ -202,38 +309,286 @@ def build_calendar_service():
         with open(token_path, "w", encoding="utf-8") as token_file:
             token_file.write(creds.to_json())
 
-    return build("calendar", "v3", credentials=creds)
+    # The bundled discovery document avoids fetching ~200 KB of JSON on every start.
+    service = build(
+        "calendar",
+        "v3",
+        credentials=creds,
+        static_discovery=True,
+        model=build_response_model(),
+    )
+    if cache:
+        _cached_service = service
+    return service
+
+
+def load_json_file(path: Path) -> dict:
+    """Read a JSON object from disk, treating a missing or corrupt file as empty."""
+    try:
+        with open(path, encoding="utf-8") as json_file:
+            data = json.load(json_file)
+    except FileNotFoundError:
+        return {}
+    except ValueError:
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def save_json_file(path: Path, data: dict) -> None:
+    with open(path, "w", encoding="utf-8") as json_file:
+        json.dump(data, json_file, ensure_ascii=False)
+
+
+def http_error_status(exc: Exception) -> int | None:
+    # googleapiclient.errors.HttpError exposes the HTTP status via `resp.status`.
+    return getattr(getattr(exc, "resp", None), "status", None)
+
+
+def default_response_cache_dir() -> Path:
+    cache_home = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(cache_home) / "gcal-worklog"
+
+
+def response_cache_key(list_params: dict) -> str:
+    key = json.dumps(list_params, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+def response_cache_path(cache_dir: Path, cache_key: str, page_index: int) -> Path:
+    # Pages are keyed by position so each run overwrites the previous run's files.
+    return cache_dir / f"{cache_key}-{page_index}.json"
+
 
+def remove_stale_response_pages(cache_dir: Path, cache_key: str, page_count: int) -> None:
+    for path in cache_dir.glob(f"{cache_key}-*.json"):
+        page_index = path.stem.rsplit("-", 1)[1]
+        if page_index.isdigit() and int(page_index) >= page_count:
+            path.unlink(missing_ok=True)
 
-def fetch_events_for_window(service, window: MonthWindow) -> list[dict]:
+
+def prune_response_cache(cache_dir: Path, max_age_seconds: float = RESPONSE_CACHE_MAX_AGE) -> None:
+    cutoff = time.time() - max_age_seconds
+    for path in cache_dir.glob("*.json"):
+        try:
+            if path.stat().st_mtime < cutoff:
+                path.unlink()
+        except FileNotFoundError:
+            continue
+
+
+def execute_with_etag_cache(request, cache_path: Path) -> dict:
+    """Execute a list request conditionally on the cached page's etag, reusing it on 304."""
+    cached = load_json_file(cache_path) or None
+    if cached and cached.get("etag"):
+        request.headers["If-None-Match"] = cached["etag"]
+    try:
+        response = request.execute()
+    except Exception as exc:
+        if cached is not None and http_error_status(exc) == 304:
+            # Refresh the mtime so prune_response_cache keeps pages that are still in use.
+            os.utime(cache_path)
+            return cached
+        raise
+    if response.get("etag"):
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        save_json_file(cache_path, response)
+    return response
+
+
+def iter_event_pages(service, *, cache_dir: Path | None = None, **list_params) -> Iterator[dict]:
+    cache_key = response_cache_key(list_params) if cache_dir is not None else ""
+
+    def submit(executor: ThreadPoolExecutor, page_token: str | None, page_index: int):
+        request = service.events().list(pageToken=page_token, **list_params)
+        if cache_dir is None:
+            return executor.submit(request.execute)
+        cache_path = response_cache_path(cache_dir, cache_key, page_index)
+        return executor.submit(execute_with_etag_cache, request, cache_path)
+
+    # Fetch page N+1 in the background while the caller processes page N.
+    # A single worker keeps at most one request in flight on the shared HTTP client.
+    page_count = 0
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        future = submit(executor, None, page_count)
+        while future is not None:
+            response = future.result()
+            page_count += 1
+            page_token = response.get("nextPageToken")
+            future = submit(executor, page_token, page_count) if page_token else None
+            yield response
+
+    if cache_dir is not None:
+        remove_stale_response_pages(cache_dir, cache_key, page_count)
+
+
+def iter_batched_event_pages(
+    service, calendar_ids: Sequence[str], **list_params
+) -> Iterator[dict]:
+    """Page through several calendars at once, one batch HTTP request per round."""
+    page_tokens: dict[str, str | None] = dict.fromkeys(calendar_ids)
+    while page_tokens:
+        responses: dict[str, dict] = {}
+        errors: list[Exception] = []
+
+        def collect(request_id: str, response: dict, exception: Exception | None) -> None:
+            if exception is not None:
+                errors.append(exception)
+            else:
+                responses[request_id] = response
+
+        pending = list(page_tokens.items())
+        for offset in range(0, len(pending), CALENDAR_BATCH_LIMIT):
+            batch = service.new_batch_http_request(callback=collect)
+            for calendar_id, page_token in pending[offset : offset + CALENDAR_BATCH_LIMIT]:
+                request = service.events().list(
+                    calendarId=calendar_id, pageToken=page_token, **list_params
+                )
+                batch.add(request, request_id=calendar_id)
+            batch.execute()
+        if errors:
+            raise errors[0]
+
+        page_tokens = {}
+        for calendar_id, response in responses.items():
+            yield response
+            page_token = response.get("nextPageToken")
+            if page_token:
+                page_tokens[calendar_id] = page_token
+
+
+def iter_events_for_window(
+    service,
+    window: MonthWindow,
+    target_title: str,
+    calendar_ids: Sequence[str] = (DEFAULT_CALENDAR_ID,),
+    cache_dir: Path | None = None,
+) -> Iterator[dict]:
+    """Yield events in the window; `cache_dir` enables the ETag page cache for one calendar."""
+    if window.end <= window.start:
+        return
+
+    list_params = {
+        "q": target_title,
+        "timeMin": window.start.isoformat(),
+        "timeMax": window.end.isoformat(),
+        "singleEvents": True,
+        "orderBy": "startTime",
+        "showDeleted": False,
+        "maxResults": 2500,
+        "fields": EVENT_LIST_FIELDS,
+    }
+    if len(calendar_ids) == 1:
+        pages = iter_event_pages(
+            service, cache_dir=cache_dir, calendarId=calendar_ids[0], **list_params
+        )
+    else:
+        pages = iter_batched_event_pages(service, calendar_ids, **list_params)
+    for response in pages:
+        yield from response.get("items", [])
+
+
+def default_sync_state_path() -> Path:
+    return Path(__file__).resolve().parent / "sync_state.json"
+
+
+def is_sync_token_expired(exc: Exception) -> bool:
+    return http_error_status(exc) == 410
+
+
+def event_overlaps_window(event: dict, window: MonthWindow) -> bool:
+    # All-day events have no dateTime and are never counted, so they do not overlap.
+    start_raw = (event.get("start") or {}).get("dateTime")
+    end_raw = (event.get("end") or {}).get("dateTime")
+    if not start_raw or not end_raw:
+        return False
+    try:
+        return (
+            parse_event_datetime(start_raw) < window.end
+            and parse_event_datetime(end_raw) > window.start
+        )
+    except ValueError:
+        return False
+
+
+def sync_events_for_window(
+    service,
+    window: MonthWindow,
+    target_title: str,
+    state_path: Path,
+    calendar_id: str = DEFAULT_CALENDAR_ID,
+) -> list[dict]:
+    """Return cached matching events for the window, refreshed with a syncToken delta.
+
+    Calendar API rejects `q`/`timeMin`/`timeMax` alongside `syncToken`, so the initial
+    full sync is bounded by the window only and deltas are filtered by title here.
+    """
     if window.end <= window.start:
         return []
 
-    events: list[dict] = []
-    page_token = None
+    state = load_json_file(state_path)
+    key = f"{calendar_id}|{target_title}|{window.start.isoformat()}|{window.end.isoformat()}"
+    entry = state.get(key) or {}
 
-    while True:
-        response = (
-            service.events()
-            .list(
-                calendarId="primary",
-                timeMin=window.start.isoformat(),
-                timeMax=window.end.isoformat(),
+    cached_events: dict[str, dict] | None = None
+    changes: list[dict] = []
+    sync_token = entry.get("sync_token")
+    if sync_token:
+        try:
+            for response in iter_event_pages(
+                service,
+                calendarId=calendar_id,
                 singleEvents=True,
-                showDeleted=False,
-                pageToken=page_token,
+                syncToken=sync_token,
                 maxResults=2500,
-            )
-            .execute()
-        )
-        events.extend(response.get("items", []))
-        page_token = response.get("nextPageToken")
-        if not page_token:
-            break
+                fields=SYNC_EVENT_LIST_FIELDS,
+            ):
+                changes.extend(response.get("items", []))
+                sync_token = response.get("nextSyncToken", sync_token)
+            cached_events = {event["id"]: event for event in entry.get("events", [])}
+        except Exception as exc:
+            if not is_sync_token_expired(exc):
+                raise
+            changes = []
+
+    if cached_events is None:
+        cached_events = {}
+        sync_token = None
+        for response in iter_event_pages(
+            service,
+            calendarId=calendar_id,
+            timeMin=window.start.isoformat(),
+            timeMax=window.end.isoformat(),
+            singleEvents=True,
+            maxResults=2500,
+            fields=SYNC_EVENT_LIST_FIELDS,
+        ):
+            changes.extend(response.get("items", []))
+            sync_token = response.get("nextSyncToken", sync_token)
+
+    for event in changes:
+        event_id = event.get("id")
+        if not event_id:
+            continue
+        if (
+            event.get("status") == "cancelled"
+            or event.get("summary") != target_title
+            or not event_overlaps_window(event, window)
+        ):
+            # syncToken deltas are not bounded by timeMin/timeMax, so out-of-window
+            # changes are dropped to keep each entry limited to its own month.
+            cached_events.pop(event_id, None)
+        else:
+            cached_events[event_id] = event
+
+    events = list(cached_events.values())
+    if sync_token:
+        state[key] = {"sync_token": sync_token, "events": events}
+        save_json_file(state_path, state)
     return events
 
 
-def parse_args(argv: list[str]) -> argparse.Namespace:
+@lru_cache(maxsize=None)
+def build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(
         description="Sum monthly work hours from Google Calendar by exact event title."
     )
@@ -259,7 +614,27 @@ def parse_args(argv: list[str]) -> argparse.Namespace:
         action="store_true",
         help="Include events up to the end of the month (default caps at current time)",
     )
-    return parser.parse_args(argv)
+    parser.add_argument(
+        "--calendar-id",
+        action="append",
+        dest="calendar_ids",
+        help=f"Calendar ID to aggregate; repeatable (default: {DEFAULT_CALENDAR_ID})",
+    )
+    parser.add_argument(
+        "--cache-responses",
+        action="store_true",
+        help="Cache API pages on disk and revalidate them with ETags (single calendar only)",
+    )
+    parser.add_argument(
+        "--incremental-sync",
+        action="store_true",
+        help="Cache matched events in sync_state.json and fetch only changes on later runs",
+    )
+    return parser
+
+
+def parse_args(argv: list[str]) -> argparse.Namespace:
+    return build_parser().parse_args(argv)
 
 
 def main(argv: list[str] | None = None) -> int:
@@ -270,9 +645,39 @@ def main(argv: list[str] | None = None) -> int:
             month_window=month_window,
             include_through_month_end=args.include_through_month_end,
         )
+        calendar_ids = args.calendar_ids or [DEFAULT_CALENDAR_ID]
+        if args.cache_responses and args.incremental_sync:
+            raise WorklogError("--cache-responses cannot be combined with --incremental-sync.")
+        if args.cache_responses and len(calendar_ids) > 1:
+            raise WorklogError("--cache-responses supports a single --calendar-id only.")
         service = build_calendar_service()
-        events = fetch_events_for_window(service, window)
-        total_seconds, matched_count, details = aggregate_event_seconds(events, args.title, window)
+        if args.incremental_sync:
+            # Sync the whole month so the cached state stays valid as the "now" cap moves.
+            state_path = default_sync_state_path()
+            events = [
+                event
+                for calendar_id in calendar_ids
+                for event in sync_events_for_window(
+                    service, month_window, args.title, state_path, calendar_id=calendar_id
+                )
+            ]
+        else:
+            # `q` is a free-text match, so aggregate_event_seconds still checks the exact title.
+            cache_dir = None
+            fetch_window = window
+            if args.cache_responses:
+                cache_dir = default_response_cache_dir()
+                if cache_dir.is_dir():
+                    prune_response_cache(cache_dir)
+                # Fetch the whole month so the cache key does not change with the "now" cap;
+                # aggregate_event_seconds clips events to `window`.
+                fetch_window = month_window
+            events = iter_events_for_window(
+                service, fetch_window, args.title, calendar_ids, cache_dir=cache_dir
+            )
+        total_seconds, matched_count, details = aggregate_event_seconds(
+            events, args.title, window, collect_details=args.show_matched_events
+        )
     except WorklogError as exc:
         print(f"Error: {exc}", file=sys.stderr)
         return 1
@@ -1,17 +1,401 @@
+import io
+import json
+import os
+import tempfile
+import time
 import unittest
+from contextlib import redirect_stderr, redirect_stdout
 from datetime import datetime
+from pathlib import Path
+from unittest import mock
 from zoneinfo import ZoneInfo
 
+import calendar_worklog
 from calendar_worklog import (
+    EVENT_LIST_FIELDS,
     MatchedEventDetail,
     MonthWindow,
     aggregate_event_seconds,
+    build_parser,
+    build_response_model,
     format_event_detail_line,
     format_seconds_as_hours_minutes,
+    iter_events_for_window,
+    load_token_credentials,
+    main,
+    parse_args,
+    parse_event_datetime,
+    parse_fixed_layout_datetime,
+    prune_response_cache,
     resolve_aggregation_window,
+    sync_events_for_window,
 )
 
 
+class FakeRequest:
+    def __init__(self, response: dict):
+        self.response = response
+        self.headers: dict[str, str] = {}
+
+    def execute(self) -> dict:
+        return self.response
+
+
+class FakeNotModifiedResponse:
+    status = 304
+
+
+class FakeNotModifiedError(Exception):
+    resp = FakeNotModifiedResponse()
+
+
+class FakeConditionalRequest(FakeRequest):
+    def execute(self) -> dict:
+        if self.headers.get("If-None-Match") == self.response.get("etag"):
+            raise FakeNotModifiedError("Not Modified")
+        return self.response
+
+
+class FakeEventsResource:
+    def __init__(self, pages: list[dict]):
+        self.pages = list(pages)
+        self.calls: list[dict] = []
+
+    def list(self, **kwargs) -> FakeRequest:
+        self.calls.append(kwargs)
+        return FakeRequest(self.pages.pop(0))
+
+
+class FakeGoneResponse:
+    status = 410
+
+
+class FakeGoneError(Exception):
+    resp = FakeGoneResponse()
+
+
+class FakeGoneRequest:
+    def execute(self) -> dict:
+        raise FakeGoneError("Sync token is no longer valid")
+
+
+class FakeExpiringEventsResource(FakeEventsResource):
+    def list(self, **kwargs):
+        if "syncToken" in kwargs:
+            self.calls.append(kwargs)
+            return FakeGoneRequest()
+        return super().list(**kwargs)
+
+
+class FakeConditionalEventsResource(FakeEventsResource):
+    def __init__(self, pages: list[dict]):
+        super().__init__(pages)
+        self.requests: list[FakeConditionalRequest] = []
+
+    def list(self, **kwargs) -> FakeConditionalRequest:
+        self.calls.append(kwargs)
+        self.requests.append(FakeConditionalRequest(self.pages.pop(0)))
+        return self.requests[-1]
+
+
+class FakeBatch:
+    def __init__(self, service: "FakeService", callback):
+        self.service = service
+        self.callback = callback
+        self.requests: list[tuple[str, FakeRequest]] = []
+
+    def add(self, request: FakeRequest, request_id: str) -> None:
+        self.requests.append((request_id, request))
+
+    def execute(self) -> None:
+        self.service.batch_sizes.append(len(self.requests))
+        for request_id, request in self.requests:
+            self.callback(request_id, request.execute(), None)
+
+
+class FakeService:
+    def __init__(self, pages: list[dict]):
+        self.events_resource = FakeEventsResource(pages)
+        self.batch_sizes: list[int] = []
+
+    def events(self) -> FakeEventsResource:
+        return self.events_resource
+
+    def new_batch_http_request(self, callback) -> FakeBatch:
+        return FakeBatch(self, callback)
+
+
+class IterEventsForWindowTests(unittest.TestCase):
+    def setUp(self):
+        self.tz = ZoneInfo("Asia/Tokyo")
+        self.window = MonthWindow(
+            start=datetime(2026, 2, 1, 0, 0, 0, tzinfo=self.tz),
+            end=datetime(2026, 3, 1, 0, 0, 0, tzinfo=self.tz),
+        )
+
+    def test_passes_title_as_query_and_follows_pages(self):
+        service = FakeService(
+            [
+                {"items": [{"summary": "案件A"}], "nextPageToken": "next"},
+                {"items": [{"summary": "案件A-打ち合わせ"}]},
+            ]
+        )
+        events = list(iter_events_for_window(service, self.window, "案件A"))
+        self.assertEqual(events, [{"summary": "案件A"}, {"summary": "案件A-打ち合わせ"}])
+        calls = service.events_resource.calls
+        self.assertEqual([call["q"] for call in calls], ["案件A", "案件A"])
+        self.assertEqual(calls[0]["orderBy"], "startTime")
+        self.assertEqual(calls[0]["fields"], EVENT_LIST_FIELDS)
+        self.assertEqual([call["pageToken"] for call in calls], [None, "next"])
+
+    def test_multiple_calendars_are_fetched_in_batches(self):
+        service = FakeService(
+            [
+                {"items": [{"summary": "案件A", "id": "p1"}], "nextPageToken": "next"},
+                {"items": [{"summary": "案件A", "id": "w1"}]},
+                {"items": [{"summary": "案件A", "id": "p2"}]},
+            ]
+        )
+        events = list(
+            iter_events_for_window(service, self.window, "案件A", ["primary", "work"])
+        )
+        self.assertEqual([event["id"] for event in events], ["p1", "w1", "p2"])
+        self.assertEqual(service.batch_sizes, [2, 1])
+        calls = service.events_resource.calls
+        self.assertEqual(
+            [(call["calendarId"], call["pageToken"]) for call in calls],
+            [("primary", None), ("work", None), ("primary", "next")],
+        )
+
+    def test_empty_window_skips_request(self):
+        service = FakeService([])
+        window = MonthWindow(start=self.window.start, end=self.window.start)
+        self.assertEqual(list(iter_events_for_window(service, window, "案件A")), [])
+        self.assertEqual(service.events_resource.calls, [])
+
+
+class ResponseCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.tz = ZoneInfo("Asia/Tokyo")
+        self.window = MonthWindow(
+            start=datetime(2026, 2, 1, 0, 0, 0, tzinfo=self.tz),
+            end=datetime(2026, 3, 1, 0, 0, 0, tzinfo=self.tz),
+        )
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.cache_dir = Path(temp_dir.name)
+
+    def conditional_service(self, pages: list[dict]) -> FakeService:
+        service = FakeService([])
+        service.events_resource = FakeConditionalEventsResource(pages)
+        return service
+
+    def run_main(self, service: FakeService, *extra_args: str) -> tuple[int, str]:
+        month = datetime.now(self.tz).strftime("%Y-%m")
+        stderr = io.StringIO()
+        with mock.patch.object(
+            calendar_worklog, "build_calendar_service", return_value=service
+        ), mock.patch.object(
+            calendar_worklog, "default_response_cache_dir", return_value=self.cache_dir
+        ), redirect_stdout(io.StringIO()), redirect_stderr(stderr):
+            exit_code = main(["--month", month, "--title", "案件A", *extra_args])
+        return exit_code, stderr.getvalue()
+
+    def test_reuses_page_on_not_modified(self):
+        page = {"etag": '"v1"', "items": [{"summary": "案件A", "id": "a"}]}
+        first = FakeService([page])
+        events = list(
+            iter_events_for_window(first, self.window, "案件A", cache_dir=self.cache_dir)
+        )
+        self.assertEqual([event["id"] for event in events], ["a"])
+
+        second = self.conditional_service([{"etag": '"v1"', "items": []}])
+        events = list(
+            iter_events_for_window(second, self.window, "案件A", cache_dir=self.cache_dir)
+        )
+        self.assertEqual([event["id"] for event in events], ["a"])
+        self.assertEqual(second.events_resource.requests[0].headers["If-None-Match"], '"v1"')
+
+    def test_default_window_runs_hit_the_cache(self):
+        page = {"etag": '"v1"', "items": []}
+        first = self.conditional_service([dict(page)])
+        self.assertEqual(self.run_main(first, "--cache-responses"), (0, ""))
+        second = self.conditional_service([dict(page)])
+        self.assertEqual(self.run_main(second, "--cache-responses"), (0, ""))
+
+        self.assertEqual(
+            first.events_resource.calls[0]["timeMax"], second.events_resource.calls[0]["timeMax"]
+        )
+        self.assertEqual(second.events_resource.requests[0].headers["If-None-Match"], '"v1"')
+        self.assertEqual(len(list(self.cache_dir.glob("*.json"))), 1)
+
+    def test_pages_beyond_the_last_are_removed(self):
+        two_pages = [
+            {"etag": '"p0"', "items": [], "nextPageToken": "next"},
+            {"etag": '"p1"', "items": []},
+        ]
+        list(
+            iter_events_for_window(
+                FakeService(two_pages), self.window, "案件A", cache_dir=self.cache_dir
+            )
+        )
+        self.assertEqual(len(list(self.cache_dir.glob("*.json"))), 2)
+
+        one_page = [{"etag": '"p0-new"', "items": []}]
+        list(
+            iter_events_for_window(
+                FakeService(one_page), self.window, "案件A", cache_dir=self.cache_dir
+            )
+        )
+        (cached_page,) = self.cache_dir.glob("*.json")
+        self.assertEqual(json.loads(cached_page.read_text(encoding="utf-8"))["etag"], '"p0-new"')
+
+    def test_prune_removes_old_pages(self):
+        old_page = self.cache_dir / "old-0.json"
+        fresh_page = self.cache_dir / "fresh-0.json"
+        old_page.write_text("{}", encoding="utf-8")
+        fresh_page.write_text("{}", encoding="utf-8")
+        old_time = time.time() - 60
+        os.utime(old_page, (old_time, old_time))
+
+        prune_response_cache(self.cache_dir, max_age_seconds=30)
+        self.assertFalse(old_page.exists())
+        self.assertTrue(fresh_page.exists())
+
+    def test_unsupported_combinations_are_rejected(self):
+        service = FakeService([])
+        exit_code, stderr = self.run_main(service, "--cache-responses", "--incremental-sync")
+        self.assertEqual(exit_code, 1)
+        self.assertIn("--incremental-sync", stderr)
+
+        exit_code, stderr = self.run_main(
+            service, "--cache-responses", "--calendar-id", "primary", "--calendar-id", "work"
+        )
+        self.assertEqual(exit_code, 1)
+        self.assertIn("single --calendar-id", stderr)
+        self.assertEqual(service.events_resource.calls, [])
+
+
+class SyncEventsForWindowTests(unittest.TestCase):
+    def setUp(self):
+        self.tz = ZoneInfo("Asia/Tokyo")
+        self.window = MonthWindow(
+            start=datetime(2026, 2, 1, 0, 0, 0, tzinfo=self.tz),
+            end=datetime(2026, 3, 1, 0, 0, 0, tzinfo=self.tz),
+        )
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.state_path = Path(temp_dir.name) / "sync_state.json"
+
+    def event(self, event_id: str, summary: str = "案件A", status: str = "confirmed") -> dict:
+        return {
+            "id": event_id,
+            "summary": summary,
+            "status": status,
+            "start": {"dateTime": "2026-02-05T10:00:00+09:00"},
+            "end": {"dateTime": "2026-02-05T11:00:00+09:00"},
+        }
+
+    def test_second_run_applies_delta_from_sync_token(self):
+        first = FakeService(
+            [
+                {
+                    "items": [self.event("a"), self.event("b"), self.event("x", "案件B")],
+                    "nextSyncToken": "t1",
+                }
+            ]
+        )
+        events = sync_events_for_window(first, self.window, "案件A", self.state_path)
+        self.assertEqual(sorted(event["id"] for event in events), ["a", "b"])
+        self.assertNotIn("syncToken", first.events_resource.calls[0])
+
+        second = FakeService(
+            [
+                {
+                    "items": [{"id": "a", "status": "cancelled"}, self.event("c")],
+                    "nextSyncToken": "t2",
+                }
+            ]
+        )
+        events = sync_events_for_window(second, self.window, "案件A", self.state_path)
+        self.assertEqual(sorted(event["id"] for event in events), ["b", "c"])
+        call = second.events_resource.calls[0]
+        self.assertEqual(call["syncToken"], "t1")
+        self.assertNotIn("timeMin", call)
+
+    def test_out_of_window_delta_is_not_cached(self):
+        first = FakeService([{"items": [self.event("a")], "nextSyncToken": "t1"}])
+        sync_events_for_window(first, self.window, "案件A", self.state_path)
+
+        moved = self.event("a")
+        moved["start"] = {"dateTime": "2026-04-05T10:00:00+09:00"}
+        moved["end"] = {"dateTime": "2026-04-05T11:00:00+09:00"}
+        later = self.event("z")
+        later["start"] = {"dateTime": "2027-01-05T10:00:00+09:00"}
+        later["end"] = {"dateTime": "2027-01-05T11:00:00+09:00"}
+        second = FakeService([{"items": [moved, later, self.event("b")], "nextSyncToken": "t2"}])
+        events = sync_events_for_window(second, self.window, "案件A", self.state_path)
+        self.assertEqual([event["id"] for event in events], ["b"])
+
+        state = json.loads(self.state_path.read_text(encoding="utf-8"))
+        (entry,) = state.values()
+        self.assertEqual([event["id"] for event in entry["events"]], ["b"])
+
+    def test_expired_sync_token_falls_back_to_full_sync(self):
+        first = FakeService([{"items": [self.event("a")], "nextSyncToken": "t1"}])
+        sync_events_for_window(first, self.window, "案件A", self.state_path)
+
+        second = FakeService([{"items": [self.event("b")], "nextSyncToken": "t2"}])
+        second.events_resource = FakeExpiringEventsResource(second.events_resource.pages)
+        events = sync_events_for_window(second, self.window, "案件A", self.state_path)
+        self.assertEqual([event["id"] for event in events], ["b"])
+        self.assertIn("timeMin", second.events_resource.calls[-1])
+
+
+class FakeCredentials:
+    loads = 0
+
+    @classmethod
+    def from_authorized_user_file(cls, filename: str, scopes: list[str]):
+        cls.loads += 1
+        return cls()
+
+
+class LoadTokenCredentialsTests(unittest.TestCase):
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.token_path = Path(temp_dir.name) / "token.json"
+        FakeCredentials.loads = 0
+        calendar_worklog._cached_token_credentials = None
+        self.addCleanup(setattr, calendar_worklog, "_cached_token_credentials", None)
+
+    def test_missing_token_returns_none(self):
+        self.assertIsNone(load_token_credentials(FakeCredentials, self.token_path))
+
+    def test_reuses_credentials_until_token_changes(self):
+        self.token_path.write_text("{}", encoding="utf-8")
+        first = load_token_credentials(FakeCredentials, self.token_path)
+        self.assertIs(load_token_credentials(FakeCredentials, self.token_path), first)
+        self.assertEqual(FakeCredentials.loads, 1)
+
+        stat = self.token_path.stat()
+        os.utime(self.token_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+        self.assertIsNot(load_token_credentials(FakeCredentials, self.token_path), first)
+        self.assertEqual(FakeCredentials.loads, 2)
+
+    def test_same_mtime_different_path_is_not_shared(self):
+        other_path = self.token_path.with_name("other_token.json")
+        self.token_path.write_text("{}", encoding="utf-8")
+        other_path.write_text("{}", encoding="utf-8")
+        stat = self.token_path.stat()
+        os.utime(other_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+        first = load_token_credentials(FakeCredentials, self.token_path)
+        self.assertIsNot(load_token_credentials(FakeCredentials, other_path), first)
+        self.assertEqual(FakeCredentials.loads, 2)
+
+
 class AggregateEventSecondsTests(unittest.TestCase):
     def setUp(self):
         self.tz = ZoneInfo("Asia/Tokyo")
@@ -33,7 +417,9 @@ class AggregateEventSecondsTests(unittest.TestCase):
                 "end": {"dateTime": "2026-02-11T02:00:00+09:00"},
             }
         ]
-        total_seconds, matched, details = aggregate_event_seconds(events, "案件A", self.window(2026, 2))
+        total_seconds, matched, details = aggregate_event_seconds(
+            events, "案件A", self.window(2026, 2), collect_details=True
+        )
         self.assertEqual(matched, 1)
         self.assertEqual(total_seconds, 4 * 3600)
         self.assertEqual(len(details), 1)
@@ -84,6 +470,22 @@ class AggregateEventSecondsTests(unittest.TestCase):
         self.assertEqual(matched, 1)
         self.assertEqual(total_seconds, 3600)
 
+    def test_details_are_skipped_unless_requested(self):
+        events = [
+            {
+                "summary": "案件A",
+                "status": "confirmed",
+                "start": {"dateTime": "2026-02-05T10:00:00+09:00"},
+                "end": {"dateTime": "2026-02-05T11:00:00+09:00"},
+            }
+        ]
+        total_seconds, matched, details = aggregate_event_seconds(
+            events, "案件A", self.window(2026, 2)
+        )
+        self.assertEqual(matched, 1)
+        self.assertEqual(total_seconds, 3600)
+        self.assertEqual(details, [])
+
     def test_all_day_events_are_excluded(self):
         events = [
             {
@@ -125,7 +527,9 @@ class AggregateEventSecondsTests(unittest.TestCase):
                 "end": {"dateTime": "2026-02-05T11:00:00+09:00"},
             },
         ]
-        _, matched, details = aggregate_event_seconds(events, "案件A", self.window(2026, 2))
+        _, matched, details = aggregate_event_seconds(
+            events, "案件A", self.window(2026, 2), collect_details=True
+        )
         self.assertEqual(matched, 2)
         self.assertEqual(
             [detail.start for detail in details],
@@ -155,6 +559,31 @@ class AggregateEventSecondsTests(unittest.TestCase):
         line = format_event_detail_line(1, detail, self.tz, show_weekday=True)
         self.assertEqual(line, "1. 2026-02-04 (Wed) 20:00 -> 2026-02-04 (Wed) 22:30 (2h30min)")
 
+    def test_parse_event_datetime_accepts_utc_suffix(self):
+        self.assertEqual(
+            parse_event_datetime("2026-02-04T11:00:00Z"),
+            datetime(2026, 2, 4, 20, 0, 0, tzinfo=self.tz),
+        )
+        self.assertEqual(
+            parse_event_datetime("2026-02-04T20:00:00+09:00"),
+            datetime(2026, 2, 4, 20, 0, 0, tzinfo=self.tz),
+        )
+
+    def test_parse_fixed_layout_datetime_matches_fromisoformat(self):
+        for value in (
+            "2026-02-04T11:00:00Z",
+            "2026-02-04T20:00:00+09:00",
+            "2026-02-04T06:30:00-05:30",
+            "2026-02-04T20:00:00.500+09:00",
+        ):
+            with self.subTest(value=value):
+                expected = datetime.fromisoformat(value.replace("Z", "+00:00"))
+                parsed = parse_fixed_layout_datetime(value)
+                self.assertEqual(parsed, expected)
+                self.assertEqual(parsed.utcoffset(), expected.utcoffset())
+        with self.assertRaises(ValueError):
+            parse_fixed_layout_datetime("2026-02-xxT20:00:00+09:00")
+
     def test_format_seconds_as_hours_minutes(self):
         self.assertEqual(format_seconds_as_hours_minutes(2.5 * 3600), "2h30min")
         self.assertEqual(format_seconds_as_hours_minutes(2 * 3600), "2h00min")
@@ -184,5 +613,47 @@ class AggregateEventSecondsTests(unittest.TestCase):
         self.assertEqual(resolved, month_window)
 
 
+class ParseArgsTests(unittest.TestCase):
+    def test_parse_args_reuses_parser_across_calls(self):
+        first = parse_args(["--month", "2026-02", "--title", "案件A", "--calendar-id", "work"])
+        second = parse_args(["--month", "2026-03", "--title", "案件B"])
+        self.assertIs(build_parser(), build_parser())
+        self.assertEqual(first.month, "2026-02")
+        self.assertEqual(first.calendar_ids, ["work"])
+        self.assertEqual(second.month, "2026-03")
+        self.assertIsNone(second.calendar_ids)
+
+
+class ResponseModelTests(unittest.TestCase):
+    def setUp(self):
+        try:
+            import orjson  # noqa: F401
+            from googleapiclient.model import JsonModel
+        except ImportError:
+            self.skipTest("orjson and googleapiclient are required")
+        self.stock_model = JsonModel()
+
+    def test_decodes_like_stock_json_model(self):
+        content = {
+            "items": [{"summary": "案件A", "start": {"dateTime": "2026-02-05T10:00:00+09:00"}}]
+        }
+        body = json.dumps(content, ensure_ascii=False).encode("utf-8")
+        self.assertEqual(
+            build_response_model().deserialize(body), self.stock_model.deserialize(body)
+        )
+
+    def test_invalid_json_falls_back_to_stock_decoder(self):
+        body = b"not json"
+        self.assertEqual(
+            build_response_model().deserialize(body), self.stock_model.deserialize(body)
+        )
+
+    def test_data_wrapper_is_unwrapped(self):
+        body = b'{"data": {"items": []}}'
+        wrapped_model = build_response_model(data_wrapper=True)
+        self.assertEqual(wrapped_model.deserialize(body), {"items": []})
+        self.assertEqual(build_response_model().deserialize(body), {"data": {"items": []}})
+
+
 if __name__ == "__main__":
     unittest.main()